@@ -1,53 +1,488 @@
 import csv
 import sys
 import os
+import re
 import argparse
+import unicodedata
+import urllib.parse
 import xml.etree.ElementTree as ET
 
+# Header names accepted for the optional file size column
+SIZE_COLUMNS = ('size', 'size (bytes)', 'bytes', 'file size')
+
+# Unit multipliers for human-readable sizes (Finder style, decimal units)
+SIZE_UNITS = {
+    'b': 1, 'byte': 1, 'bytes': 1,
+    'k': 1000, 'kb': 1000, 'm': 1000**2, 'mb': 1000**2,
+    'g': 1000**3, 'gb': 1000**3, 't': 1000**4, 'tb': 1000**4,
+    'kib': 1024, 'mib': 1024**2, 'gib': 1024**3, 'tib': 1024**4,
+}
+
+# Lookup keys used to match XML media against the inventory, from most to least strict
+MATCH_KEY_KINDS = ('exact name', 'file path', 'normalized name', 'reel/clip id')
+
+# Clip-name suffixes added by Resolve (and friends) that are not part of the file name.
+# Applied repeatedly to case-folded names, so e.g. "a001.mov.new" -> "a001.mov" -> "a001".
+# Only stripped from XML clip names; inventory names keep them, as "Clip (1).mov" is a real file.
+CLIP_SUFFIX_PATTERNS = (
+    re.compile(r'\.new(\.\d+)?$'),                   # "Clip.mov.new.01"
+    re.compile(r'\s*\(\d+\)$'),                      # "Clip (1)"
+    re.compile(r'\s*-\s*(copy|subclip)(\s*\d+)?$'),   # "Clip - Copy", "Clip - Subclip 2"
+    re.compile(r'\.(mov|mxf|mp4|m4v|avi|mts|r3d|braw|crm|ari|arx|dng|wav|aif|aiff)$'),
+)
+
+# Camera letter + reel + clip number, e.g. A001C003 (ARRI), A_0045C016, A001_C003 (RED)
+REEL_CLIP_PATTERN = re.compile(r'(?<![a-z0-9])([a-z])_?(\d{3,4})_?c(\d{3,4})(?!\d)')
+
+def parse_size(value):
+    """
+    Converts a size value from the CSV into bytes.
+    Accepts plain byte counts ("1234567", "1,234,567", "1.234.567") and
+    human-readable sizes ("1.5 GB", "1,5 GB", "1.234,5 MB", "700 MiB").
+    Returns None if the value cannot be interpreted.
+    """
+    if not value:
+        return None
+    text = value.strip().lower()
+    if not text:
+        return None
+
+    number = text
+    unit = 'b'
+    for i, ch in enumerate(text):
+        if not (ch.isdigit() or ch in '.,'):
+            number = text[:i].strip()
+            unit = text[i:].strip()
+            break
+
+    # Commas are only thousands separators in "1,234,567"; otherwise a single comma is
+    # a decimal point ("1,5 GB" and "1.234,5 MB" from comma-decimal locales)
+    if re.fullmatch(r'\d{1,3}(,\d{3})+(\.\d+)?', number):
+        number = number.replace(',', '')
+    elif re.fullmatch(r'\d{1,3}(\.\d{3})+,\d+', number) or re.fullmatch(r'\d{1,3}(\.\d{3}){2,}', number):
+        number = number.replace('.', '').replace(',', '.')
+    elif re.fullmatch(r'\d+,\d+', number):
+        number = number.replace(',', '.')
+
+    if not number or unit not in SIZE_UNITS:
+        return None
+    try:
+        return int(float(number) * SIZE_UNITS[unit])
+    except ValueError:
+        return None
+
 def parse_xml_media(xml_file_path):
     """
     Parses an XML file and extracts media filenames.
-    Assumes media file names are located in //file/name.
+    Assumes media file names are located in //clipitem/name and //file/name.
+    Returns a dict of base name -> source file path taken from the matching
+    <file><pathurl> (None when the XML does not provide one). Clips that only
+    reference a file (<file id="..."/>) get the pathurl of its full definition.
     """
-    media_names = set()
+    media_names = {}
+    file_pathurls = {} # <file id> -> path, from the full <file> definitions
+
+    def add(name_elem, file_elem):
+        if name_elem is None or not name_elem.text:
+            return
+        full_name = name_elem.text.strip()
+        if not full_name:
+            return
+        # Ignore generic names often used for slugs or generators if needed
+        if full_name.lower() == "slug":
+            return
+
+        pathurl = None
+        if file_elem is not None:
+            pathurl_elem = file_elem.find('pathurl')
+            if pathurl_elem is not None and pathurl_elem.text and pathurl_elem.text.strip():
+                pathurl = pathurl_to_path(pathurl_elem.text.strip())
+            else:
+                pathurl = file_pathurls.get(file_elem.get('id'))
+
+        base_name = os.path.splitext(full_name)[0]
+        if not media_names.get(base_name):
+            media_names[base_name] = pathurl
+
     try:
         tree = ET.parse(xml_file_path)
         root = tree.getroot()
+
+        # FCP7 XML defines each <file id="..."> once and later clips only reference it,
+        # so collect every pathurl before looking at the clips
+        for file_elem in root.iter('file'):
+            pathurl_elem = file_elem.find('pathurl')
+            if file_elem.get('id') and pathurl_elem is not None and pathurl_elem.text and pathurl_elem.text.strip():
+                file_pathurls[file_elem.get('id')] = pathurl_to_path(pathurl_elem.text.strip())
         
         # 1. Search in <clipitem> elements (common in FCP7 XMLs used by Resolve)
         for clip_elem in root.iter('clipitem'):
-            name_elem = clip_elem.find('name')
-            if name_elem is not None and name_elem.text:
-                full_name = name_elem.text.strip()
-                if not full_name:
-                    continue
-                # Ignore generic names often used for slugs or generators if needed
-                if full_name.lower() == "slug":
-                     continue
-                     
-                base_name = os.path.splitext(full_name)[0]
-                media_names.add(base_name)
+            add(clip_elem.find('name'), clip_elem.find('file'))
 
         # 2. Search in <file> elements as a fallback or addition
         for file_elem in root.iter('file'):
-            name_elem = file_elem.find('name')
-            if name_elem is not None and name_elem.text:
-                full_name = name_elem.text.strip()
-                if not full_name:
-                    continue
-                if full_name.lower() == "slug":
-                     continue
-
-                base_name = os.path.splitext(full_name)[0]
-                media_names.add(base_name)
+            add(file_elem.find('name'), file_elem)
                 
     except Exception as e:
         print(f"Error parsing XML file: {e}")
-        return set()
+        return {}
     return media_names
 
 
-def extract_lto_tapes(csv_file_path, xml_media_names=None):
+def pathurl_to_path(pathurl):
+    """
+    Converts an XML <pathurl> (e.g. file://localhost/Volumes/RAID/clip%20A.mov) to a filesystem path.
+    """
+    parsed = urllib.parse.urlparse(pathurl)
+    if parsed.scheme and parsed.scheme != 'file':
+        return None
+    return urllib.parse.unquote(parsed.path if parsed.scheme else pathurl)
+
+
+def normalize_name(name, strip_suffixes=True):
+    """
+    Normalizes a clip or file base name for loose matching: Unicode NFC, case-folded,
+    and unless strip_suffixes is False, with Resolve clip-name suffixes and stray
+    media extensions removed.
+    """
+    name = unicodedata.normalize('NFC', name).casefold().strip()
+    if not strip_suffixes:
+        return name
+    previous = None
+    while name != previous:
+        previous = name
+        for pattern in CLIP_SUFFIX_PATTERNS:
+            name = pattern.sub('', name).strip()
+    return name
+
+
+def normalize_path(path):
+    """
+    Normalizes a file path for matching: Unicode NFC, case-folded (volumes are
+    usually case-insensitive) and without the LTFS1_ mount prefix added by macOS.
+    """
+    parts = unicodedata.normalize('NFC', path).casefold().split('/')
+    # Typically ['', 'volumes', 'ltfs1_tapename', ...]
+    if len(parts) > 2 and parts[1] == 'volumes' and parts[2].startswith('ltfs1_'):
+        parts[2] = parts[2][len('ltfs1_'):]
+    return '/'.join(parts)
+
+
+def reel_clip_token(name):
+    """
+    Extracts a camera/reel/clip identifier (e.g. A001C003, A_0045C016, A001_C003)
+    from a name, ignoring zero padding. Returns None if the name has no such token.
+    """
+    match = REEL_CLIP_PATTERN.search(unicodedata.normalize('NFC', name).casefold())
+    if not match:
+        return None
+    camera, reel, clip = match.groups()
+    return f"{camera}{int(reel)}c{int(clip)}"
+
+
+def read_inventory(csv_file_path):
+    """
+    Reads the master CSV once and returns its rows as (tape, file_path, filename, size) tuples.
+    size is in bytes, or None when the CSV has no (valid) size column.
+    Raises the underlying exception if the file cannot be read.
+    """
+    rows = []
+
+    def add(tape, dir_path, filename, size=None):
+        tape = tape.strip()
+        filename = filename.strip()
+        dir_path = dir_path.strip()
+        if not tape:
+            return
+
+        # Construct full file path
+        if dir_path and filename:
+            file_path = os.path.join(dir_path, filename)
+        else:
+            file_path = dir_path or filename
+        rows.append((tape, file_path, filename, size))
+
+    with open(csv_file_path, mode='r', encoding='utf-8', errors='replace') as csvfile:
+        # Detect whether the file has a header
+        sample = csvfile.read(1024)
+        csvfile.seek(0)
+        has_header = csv.Sniffer().has_header(sample)
+
+        # Based on previous `head` output:
+        # Path,Media,Type,Name,...
+        # Path is index 0, Media is index 1, Name is index 3
+
+        if has_header:
+            reader = csv.DictReader(csvfile)
+
+            # Locate the optional size column, whatever its exact spelling
+            size_column = None
+            for column in reader.fieldnames or []:
+                if column and column.strip().lower() in SIZE_COLUMNS:
+                    size_column = column
+                    break
+
+            for row in reader:
+                size = parse_size(row.get(size_column) or '') if size_column else None
+                add(row.get('Media') or '', row.get('Path') or '', row.get('Name') or '', size)
+        else:
+            # Fallback if no header
+            # Logic for manual column mapping if header is missing but data structure is known
+            # 0: Path, 1: Media, 3: Name
+            # The Sniffer misses headers when every column is text (e.g. "1.5 GB" sizes),
+            # so a header row is still used to locate the optional size column.
+            reader = csv.reader(csvfile)
+            size_index = None
+            for i, row in enumerate(reader):
+                # Check if first row is actually a header that wasn't detected
+                if i == 0 and len(row) > 1 and row[1] == 'Media':
+                    for j, column in enumerate(row):
+                        if column.strip().lower() in SIZE_COLUMNS:
+                            size_index = j
+                            break
+                    continue
+                if len(row) > 3:
+                    size = parse_size(row[size_index]) if size_index is not None and len(row) > size_index else None
+                    add(row[1], row[0], row[3], size)
+
+    return rows
+
+
+def build_match_index(rows):
+    """
+    Precomputes lookup tables over the inventory rows so that each XML clip can be
+    resolved with a few hash lookups instead of a CSV rescan.
+
+    Returns:
+        dict: Key kind -> dict of key -> list of row indices. Key kinds are
+        'exact name', 'file path', 'normalized name' (case and Unicode only),
+        'name stem' (suffixes stripped, used to spot numbered variants) and 'reel/clip id'.
+    """
+    index = {kind: {} for kind in ('exact name', 'file path', 'normalized name', 'name stem', 'reel/clip id')}
+    for i, (tape, file_path, filename, size) in enumerate(rows):
+        base_name = os.path.splitext(filename or os.path.basename(file_path))[0]
+        keys = {
+            'exact name': base_name,
+            'file path': normalize_path(file_path),
+            'normalized name': normalize_name(base_name, strip_suffixes=False),
+            'name stem': normalize_name(base_name),
+            'reel/clip id': reel_clip_token(base_name),
+        }
+        for kind, key in keys.items():
+            if key:
+                index[kind].setdefault(key, []).append(i)
+    return index
+
+
+def row_base_name(row):
+    """
+    Returns the normalized (case and Unicode only) base name of an inventory row.
+    """
+    tape, file_path, filename, size = row
+    return normalize_name(os.path.splitext(filename or os.path.basename(file_path))[0], strip_suffixes=False)
+
+
+def group_copies(rows, row_indices):
+    """
+    Groups rows that are copies of the same file on different tapes (primary/clone LTO sets):
+    same normalized file name, and the same size when the CSV lists it.
+
+    Returns:
+        list: One list of row indices per distinct file, in CSV order.
+    """
+    groups = {}
+    for i in sorted(row_indices):
+        tape, file_path, filename, size = rows[i]
+        name = normalize_name(filename or os.path.basename(file_path), strip_suffixes=False)
+        groups.setdefault((name, size), []).append(i)
+
+    # Rows without a size are copies of the sized file of the same name, if there is only one
+    sized = {}
+    for name, size in groups:
+        if size is not None:
+            sized.setdefault(name, []).append(size)
+    for name, size in list(groups):
+        if size is None and len(sized.get(name, [])) == 1:
+            groups[(name, sized[name][0])].extend(groups.pop((name, None)))
+
+    return sorted((sorted(g) for g in groups.values()), key=lambda g: g[0])
+
+
+def narrow_loose_match(rows, row_indices, names):
+    """
+    Decides whether a loose (normalized name or reel/clip id) hit can be trusted.
+    Only the rows whose name is a prefix of the clip name (or the reverse) are kept,
+    e.g. clip "A001C003_210101_R1AB_graded" keeps "A001C003_210101_R1AB" but not
+    "A001C003_220909_R2CD"; if none are, every row of the hit is considered.
+    The hit is accepted when the remaining rows are all the same clip: one base name
+    (extension variants such as .mov/.mxf are left to the extension prompt) and no
+    conflicting sizes for the same file name. Copies on other tapes are fine.
+
+    Returns:
+        list: Accepted row indices, or None if the hit is ambiguous.
+    """
+    clip_names = set()
+    for n in names:
+        clip_names.add(normalize_name(n, strip_suffixes=False))
+        clip_names.add(normalize_name(n))
+
+    narrowed = []
+    for i in row_indices:
+        row_name = row_base_name(rows[i])
+        if any(n.startswith(row_name) or row_name.startswith(n) for n in clip_names):
+            narrowed.append(i)
+    if not narrowed:
+        narrowed = list(row_indices)
+
+    if len(set(row_base_name(rows[i]) for i in narrowed)) > 1:
+        return None
+    files = group_copies(rows, narrowed)
+    file_names = [normalize_name(rows[g[0]][2] or os.path.basename(rows[g[0]][1]), strip_suffixes=False) for g in files]
+    if len(set(file_names)) != len(file_names):
+        return None
+    return narrowed
+
+
+def match_media(index, rows, xml_media_names):
+    """
+    Resolves XML media against a match index, trying the keys from most to least strict:
+    exact base name, <pathurl> file path (or its file name), normalized name, then camera
+    reel/clip id. Names taken from the <pathurl> file name are tried alongside the clip name.
+    Loose hits that point to more than one clip (see narrow_loose_match()), or that could be
+    a numbered variant ("Clip (2)" when the inventory has "Clip (1)" and "Clip (3)"), are
+    reported as ambiguous and not matched.
+    When the same file is on several tapes, only one copy is matched, preferring tapes
+    that are needed anyway.
+
+    Args:
+        index (dict): Index from build_match_index().
+        rows (list): Inventory rows from read_inventory().
+        xml_media_names (dict or set): Base names, optionally mapped to their <pathurl> path.
+
+    Returns:
+        tuple: (set of matched row indices,
+                dict of name -> (key kind, matched row indices, skipped copy row indices)
+                for resolved media,
+                dict of name -> (key kind, candidate row indices) for ambiguous media,
+                sorted list of unresolved names)
+    """
+    pathurls = xml_media_names if isinstance(xml_media_names, dict) else {}
+    hits_by_name = {}
+    ambiguous = {}
+    unresolved = []
+
+    for name in xml_media_names:
+        path = pathurls.get(name)
+        names = [name]
+        if path:
+            path_name = os.path.splitext(os.path.basename(path))[0]
+            if path_name and path_name != name:
+                names.append(path_name)
+
+        # (reported as, index table, key); a hit on the <pathurl> file name counts as a path match
+        candidates = [('exact name', 'exact name', name)]
+        if path:
+            candidates.append(('file path', 'file path', normalize_path(path)))
+            candidates += [('file path', 'exact name', n) for n in names[1:]]
+        candidates += [('normalized name', 'normalized name', normalize_name(n, strip_suffixes=False)) for n in names]
+        candidates += [('normalized name', 'normalized name', normalize_name(n)) for n in names]
+        candidates += [('reel/clip id', 'reel/clip id', reel_clip_token(n)) for n in names]
+
+        unstripped = set(normalize_name(n, strip_suffixes=False) for n in names)
+
+        for label, kind, key in candidates:
+            if not key or key not in index[kind]:
+                continue
+            hits = index[kind][key]
+
+            if label in ('normalized name', 'reel/clip id'):
+                # Other files sharing the stem (e.g. "Clip (1)", "Clip - Copy") mean the
+                # stripped suffix may have been meaningful
+                if kind == 'normalized name' and key not in unstripped and len(index['name stem'].get(key, [])) > len(hits):
+                    ambiguous.setdefault(name, (label, index['name stem'][key]))
+                    continue
+                accepted = narrow_loose_match(rows, hits, names)
+                if accepted is None:
+                    ambiguous.setdefault(name, (label, hits))
+                    continue
+                hits = accepted
+
+            hits_by_name[name] = (label, hits)
+            ambiguous.pop(name, None)
+            break
+        else:
+            if name not in ambiguous:
+                unresolved.append(name)
+
+    # Pick one copy of every file: files with a single copy fix their tapes first,
+    # then each remaining file takes a copy on an already needed tape if it can
+    matched_rows = set()
+    needed_tapes = set()
+    pending = []
+    for name, (label, hits) in hits_by_name.items():
+        for copies in group_copies(rows, hits):
+            if len(copies) == 1:
+                matched_rows.add(copies[0])
+                needed_tapes.add(rows[copies[0]][0])
+            else:
+                pending.append(copies)
+
+    for copies in pending:
+        if any(i in matched_rows for i in copies):
+            continue
+        chosen = min(copies, key=lambda i: (rows[i][0] not in needed_tapes, rows[i][0]))
+        matched_rows.add(chosen)
+        needed_tapes.add(rows[chosen][0])
+
+    resolved = {}
+    for name, (label, hits) in hits_by_name.items():
+        resolved[name] = (label, [i for i in hits if i in matched_rows], [i for i in hits if i not in matched_rows])
+
+    return matched_rows, resolved, ambiguous, sorted(unresolved)
+
+
+def print_match_report(match_report):
+    """
+    Prints every XML media item with the key that resolved it and the file(s) it matched,
+    followed by the ambiguous media (not restored) and the unresolved media.
+    """
+    resolved = match_report.get('resolved', {})
+    ambiguous = match_report.get('ambiguous', {})
+    unresolved = match_report.get('unresolved', [])
+
+    def print_files(files):
+        for tape, file_path in files:
+            print(f"     {tape}: {file_path}")
+
+    print("\n" + "="*40)
+    print("Match Report")
+    print("="*40)
+    counts = [f"{kind}: {sum(1 for k, f, c in resolved.values() if k == kind)}" for kind in MATCH_KEY_KINDS]
+    print(f"Resolved: {len(resolved)} ({', '.join(counts)})")
+    for name in sorted(resolved):
+        kind, files, copies = resolved[name]
+        tapes = sorted(set(tape for tape, file_path in files))
+        if len(files) == 1:
+            print(f" - {name} [{kind}] -> {files[0][0]}: {files[0][1]}")
+        else:
+            print(f" - {name} [{kind}] -> MULTIPLE: {len(files)} files on {', '.join(tapes)}")
+            print_files(files)
+        if copies:
+            copy_tapes = sorted(set(tape for tape, file_path in copies))
+            print(f"     (taken from {', '.join(tapes)} only; same file also on {', '.join(copy_tapes)})")
+
+    print(f"Ambiguous (not restored): {len(ambiguous)}")
+    for name in sorted(ambiguous):
+        kind, files = ambiguous[name]
+        print(f" - {name} [{kind}] -> {len(files)} candidates:")
+        print_files(files)
+
+    print(f"Unresolved: {len(unresolved)}")
+    for name in unresolved:
+        print(f" - {name}")
+
+
+def extract_lto_tapes(csv_file_path, xml_media_names=None, file_sizes=None, match_report=None):
     """
     Reads a CSV file.
     If xml_media_names is provided, returns LTO tapes that contain any of the media names.
@@ -55,7 +490,14 @@ def extract_lto_tapes(csv_file_path, xml_media_names=None):
     
     Args:
         csv_file_path (str): Path to the CSV file.
-        xml_media_names (set, optional): Set of media filenames to search for.
+        xml_media_names (dict or set, optional): Media names to search for, as returned
+            by parse_xml_media().
+        file_sizes (dict, optional): If provided, filled with file path -> size in bytes
+            for every returned file whose size is listed in the CSV (requires a header row).
+        match_report (dict, optional): If provided, filled with 'resolved'
+            (name -> (key kind, matched (tape, file path) list, skipped copies list)),
+            'ambiguous' (name -> (key kind, candidate (tape, file path) list)) and
+            'unresolved' (list of names) for the XML media.
         
     Returns:
         dict: A dictionary where key is LTO tape name and value is a list of file paths.
@@ -63,117 +505,38 @@ def extract_lto_tapes(csv_file_path, xml_media_names=None):
     tape_files_map = {}
     
     try:
-        with open(csv_file_path, mode='r', encoding='utf-8', errors='replace') as csvfile:
-            # Detect whether the file has a header
-            sample = csvfile.read(1024)
-            csvfile.seek(0)
-            has_header = csv.Sniffer().has_header(sample)
-            
-            reader = csv.DictReader(csvfile) if has_header else csv.reader(csvfile)
-            
-            # If we are searching for specific media, we need to look at 'Media' (LTO) AND 'Name' (Filename)
-            # Based on previous `head` output:
-            # Path,Media,Type,Name,...
-            # Path is index 0, Media is index 1, Name is index 3
-            
-            if has_header:
-                for row in reader:
-                    tape = row.get('Media', '').strip()
-                    filename = row.get('Name', '').strip()
-                    dir_path = row.get('Path', '').strip()
-                    
-                    if not tape:
-                        continue
-
-                    # Construct full file path
-                    if dir_path and filename:
-                        file_path = os.path.join(dir_path, filename)
-                    else:
-                        file_path = dir_path or filename
-
-                    
-                    if not tape:
-                        continue
-                        
-                    if xml_media_names:
-                        # Check if base name matches any in the XML list
-                        base_name = os.path.splitext(filename)[0]
-                        if base_name in xml_media_names:
-                            if tape not in tape_files_map:
-                                tape_files_map[tape] = []
-                            tape_files_map[tape].append(file_path)
-                    else:
-                         if tape not in tape_files_map:
-                                tape_files_map[tape] = []
-                         # If no XML filter, we essentially just want the list of tapes, 
-                         # but we'll store paths anyway for consistency if needed, 
-                         # or just store empty list if paths aren't the primary goal without filter.
-                         # For now, let's just store the paths to be safe.
-                         tape_files_map[tape].append(file_path)
-            else:
-                 # Fallback if no header
-                 reader = csv.reader(csvfile)
-                 first_row = next(reader, None)
-                 
-                 # Logic for manual column mapping if header is missing but data structure is known
-                 # 0: Path, 1: Media, 3: Name
-                 
-                 if first_row:
-                     # Check if first row is actually a header that wasn't detected
-                     if first_row[1] == 'Media':
-                         pass # Skip, it's a header
-                     else:
-                        # Process first row
-                        if len(first_row) > 3:
-                            tape = first_row[1].strip()
-                            filename = first_row[3].strip()
-                            dir_path = first_row[0].strip()
-                            if dir_path and filename:
-                                file_path = os.path.join(dir_path, filename)
-                            else:
-                                file_path = dir_path or filename
-                                
-                            if tape:
-                                if xml_media_names:
-                                    base_name = os.path.splitext(filename)[0]
-                                    if base_name in xml_media_names:
-                                        if tape not in tape_files_map:
-                                            tape_files_map[tape] = []
-                                        tape_files_map[tape].append(file_path)
-                                else:
-                                     if tape not in tape_files_map:
-                                        tape_files_map[tape] = []
-                                     tape_files_map[tape].append(file_path)
-
-                 for row in reader:
-                     if len(row) > 3:
-                         tape = row[1].strip()
-                         filename = row[3].strip()
-                         dir_path = row[0].strip()
-                         
-                         if dir_path and filename:
-                             file_path = os.path.join(dir_path, filename)
-                         else:
-                             file_path = dir_path or filename
-                             
-                         if tape:
-                              if xml_media_names:
-                                 base_name = os.path.splitext(filename)[0]
-                                 if base_name in xml_media_names:
-                                     if tape not in tape_files_map:
-                                        tape_files_map[tape] = []
-                                     tape_files_map[tape].append(file_path)
-                              else:
-                                 if tape not in tape_files_map:
-                                    tape_files_map[tape] = []
-                                 tape_files_map[tape].append(file_path)
-
+        rows = read_inventory(csv_file_path)
     except FileNotFoundError:
         print(f"Error: File '{csv_file_path}' not found.")
         return {}
     except Exception as e:
         print(f"Error reading CSV file: {e}")
         return {}
+
+    if xml_media_names:
+        index = build_match_index(rows)
+        matched_rows, resolved, ambiguous, unresolved = match_media(index, rows, xml_media_names)
+        if match_report is not None:
+            def files(row_indices):
+                return [(rows[i][0], rows[i][1]) for i in sorted(row_indices)]
+            match_report['resolved'] = {n: (k, files(r), files(c)) for n, (k, r, c) in resolved.items()}
+            match_report['ambiguous'] = {n: (k, files(r)) for n, (k, r) in ambiguous.items()}
+            match_report['unresolved'] = unresolved
+    else:
+        # If no XML filter, we essentially just want the list of tapes,
+        # but we'll store the paths anyway for consistency.
+        matched_rows = None
+
+    # Walk the rows in CSV order so file order per tape is stable
+    for i, (tape, file_path, filename, size) in enumerate(rows):
+        if matched_rows is not None and i not in matched_rows:
+            continue
+        if tape not in tape_files_map:
+            tape_files_map[tape] = []
+        tape_files_map[tape].append(file_path)
+
+        if file_sizes is not None and size is not None:
+            file_sizes[file_path] = size
         
     return tape_files_map
 
@@ -205,7 +568,10 @@ def main():
         print("-" * 30)
 
     print(f"Scanning CSV file: {csv_file}...")
-    tape_files_map = extract_lto_tapes(csv_file, xml_media_names)
+    match_report = {}
+    tape_files_map = extract_lto_tapes(csv_file, xml_media_names, match_report=match_report)
+    if match_report:
+        print_match_report(match_report)
     
     if tape_files_map:
         # Analyze found files for extensions and potential duplicates
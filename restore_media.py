@@ -3,7 +3,7 @@ import sys
 import os
 import shutil
 import time
-from extract_lto_tapes import extract_lto_tapes, parse_xml_media
+from extract_lto_tapes import extract_lto_tapes, parse_size, parse_xml_media, print_match_report
 
 def copy_with_progress(src, dst, buffer_size=1024*1024):
     """
@@ -33,29 +33,167 @@ def copy_with_progress(src, dst, buffer_size=1024*1024):
     print() # Newline after completion
     shutil.copystat(src, dst)
 
-def restore_media(csv_file, xml_file, destination):
+def format_size(num_bytes):
     """
-    Coordinates the restoration of media from LTO tapes.
+    Formats a byte count for display (decimal units, as shown by Finder).
+    """
+    size = float(num_bytes)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1000:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1000
+    return f"{size:.2f} TB"
+
+# Default space kept free on every destination volume (see --reserve): the larger of a
+# fixed headroom and a share of the volume, to absorb block rounding, collision copies
+# and other writers.
+RESERVE_BYTES = 10 * 1000**3
+RESERVE_FRACTION = 0.02
+
+def get_free_space(path):
+    """
+    Returns the number of bytes available to the current user on the volume holding path.
     """
-    if not os.path.exists(destination):
+    st = os.statvfs(path)
+    return st.f_bavail * st.f_frsize
+
+def parse_reserve(value):
+    """
+    Parses a --reserve value: a percentage of the volume ("2%") or a size ("500 GB", "0").
+    Returns a fraction (float) for percentages or a byte count (int) for sizes.
+    """
+    text = value.strip()
+    if text.endswith('%'):
         try:
-            os.makedirs(destination)
-        except OSError as e:
-            print(f"Error creating destination directory: {e}")
-            return
+            fraction = float(text[:-1]) / 100
+        except ValueError:
+            fraction = -1
+        if not 0 <= fraction < 1:
+            raise argparse.ArgumentTypeError(f"invalid percentage: '{value}'")
+        return fraction
+
+    size = parse_size(text)
+    if size is None:
+        raise argparse.ArgumentTypeError(f"invalid size: '{value}' (use e.g. 500GB or 2%)")
+    return size
+
+def get_reserve(path, reserve=None):
+    """
+    Returns the number of bytes to leave free on the volume holding path.
+    reserve is a fraction of the volume (float), a byte count (int), or None for the
+    default of max(RESERVE_BYTES, RESERVE_FRACTION of the volume).
+    """
+    st = os.statvfs(path)
+    volume_size = st.f_blocks * st.f_frsize
+    if reserve is None:
+        return max(RESERVE_BYTES, int(volume_size * RESERVE_FRACTION))
+    if isinstance(reserve, float):
+        return int(volume_size * reserve)
+    return reserve
+
+def get_usable_space(path, reserve=None):
+    """
+    Returns the free space on the volume holding path, minus the safety reserve.
+    """
+    return max(0, get_free_space(path) - get_reserve(path, reserve))
+
+def plan_destinations(tape_files_map, file_sizes, destinations, reserve=None):
+    """
+    Assigns every file to one of the destination folders without exceeding free space
+    (less the safety reserve from get_reserve(), see reserve).
+    Files from the same tape are kept together where possible; a tape that does not fit
+    on any single volume is split by source folder, and a folder that still does not fit
+    is split file by file. Destinations on the same volume share its free space.
+
+    Args:
+        tape_files_map (dict): Tape name -> list of file paths.
+        file_sizes (dict): File path -> size in bytes (files missing here count as 0).
+        destinations (list): Destination folders, in order of preference.
+        reserve (float or int, optional): Space to keep free per volume, as for get_reserve().
+
+    Returns:
+        tuple: (dict of file path -> destination folder, list of file paths that do not fit)
+    """
+    # Destinations sharing a device share the same pool of free bytes
+    destination_devices = {}
+    device_free = {}
+    for dest in destinations:
+        device = os.stat(dest).st_dev
+        destination_devices[dest] = device
+        if device not in device_free:
+            device_free[device] = get_usable_space(dest, reserve)
+
+    assignments = {}
+    unplaced = []
+
+    def group_size(files):
+        return sum(file_sizes.get(f, 0) for f in files)
+
+    def place(files):
+        # First fit: the first destination with room for the whole group wins
+        size = group_size(files)
+        for dest in destinations:
+            device = destination_devices[dest]
+            if device_free[device] >= size:
+                device_free[device] -= size
+                for f in files:
+                    assignments[f] = dest
+                return True
+        return False
+
+    # Biggest tapes first leaves the smaller ones to fill the gaps
+    for tape in sorted(tape_files_map, key=lambda t: group_size(tape_files_map[t]), reverse=True):
+        files = tape_files_map[tape]
+        if place(files):
+            continue
+
+        folders = {}
+        for f in files:
+            folders.setdefault(os.path.dirname(f), []).append(f)
+
+        for folder in sorted(folders, key=lambda d: group_size(folders[d]), reverse=True):
+            folder_files = folders[folder]
+            if place(folder_files):
+                continue
+            for f in sorted(folder_files, key=lambda x: file_sizes.get(x, 0), reverse=True):
+                if not place([f]):
+                    unplaced.append(f)
+
+    return assignments, unplaced
+
+def restore_media(csv_file, xml_file, destinations, reserve=None):
+    """
+    Coordinates the restoration of media from LTO tapes.
+    destinations may be a single folder or a list of folders (possibly on different volumes).
+    reserve is the space to keep free on each volume (see get_reserve()).
+    """
+    if isinstance(destinations, str):
+        destinations = [destinations]
+
+    for destination in destinations:
+        if not os.path.exists(destination):
+            try:
+                os.makedirs(destination)
+            except OSError as e:
+                print(f"Error creating destination directory: {e}")
+                return
 
     print("Analyzing requirements...")
+    file_sizes = {}
     if xml_file:
          print(f"Parsing XML file: {xml_file}...")
          xml_media_names = parse_xml_media(xml_file)
          print(f"Found {len(xml_media_names)} unique media items in XML.")
-         tape_files_map = extract_lto_tapes(csv_file, xml_media_names)
+         match_report = {}
+         tape_files_map = extract_lto_tapes(csv_file, xml_media_names, file_sizes, match_report)
+         if match_report:
+             print_match_report(match_report)
     else:
          print("No XML file provided. Scanning entire CSV (this might restore A LOT of files)...")
          # If no XML is provided, we restore everything? Or should we warn?
          # The prompt implies getting the list "found in the CSV" which usually means filtered by XML
          # based on context, but let's handle the extraction call.
-         tape_files_map = extract_lto_tapes(csv_file)
+         tape_files_map = extract_lto_tapes(csv_file, file_sizes=file_sizes)
     
     if not tape_files_map:
         print("No files to restore found.")
@@ -125,8 +263,49 @@ def restore_media(csv_file, xml_file, destination):
     total_tapes = len(sorted_tapes)
     print(f"\nRestoration Plan:")
     print(f"Found files on {total_tapes} tapes.")
+    total_bytes = 0
+    unknown_sizes = 0
     for tape in sorted_tapes:
-        print(f" - {tape}: {len(tape_files_map[tape])} files")
+        tape_bytes = sum(file_sizes.get(f, 0) for f in tape_files_map[tape])
+        unknown_sizes += sum(1 for f in tape_files_map[tape] if f not in file_sizes)
+        total_bytes += tape_bytes
+        print(f" - {tape}: {len(tape_files_map[tape])} files, {format_size(tape_bytes)}")
+    print(f"Total to restore: {format_size(total_bytes)}")
+    if unknown_sizes:
+        # Without sizes the plan below cannot prove anything fits, so don't go ahead silently
+        print(f"\nERROR: {unknown_sizes} files have no size in the CSV, so free space cannot be checked for them.")
+        print("Add a Size column to the CSV header to enable the space check.")
+        confirm = input("Type 'yes' to restore anyway without a complete space check, or press ENTER to abort: ").strip().lower()
+        if confirm != 'yes':
+            print("Restoration aborted.")
+            return
+
+    # Check free space and spread files across destinations before any tape is mounted
+    try:
+        file_destinations, unplaced = plan_destinations(tape_files_map, file_sizes, destinations, reserve)
+    except OSError as e:
+        print(f"Error checking free space on destination: {e}")
+        return
+
+    if unplaced:
+        unplaced_bytes = sum(file_sizes.get(f, 0) for f in unplaced)
+        print(f"\nERROR: Not enough free space on the destination(s) for {len(unplaced)} files ({format_size(unplaced_bytes)}).")
+        for dest in destinations:
+            print(f" - {dest}: {format_size(get_free_space(dest))} free, {format_size(get_reserve(dest, reserve))} kept in reserve")
+        print("Add another destination with --dest, free up space or lower --reserve. Restoration aborted.")
+        return
+
+    print("\nDestination Plan:")
+    if unknown_sizes:
+        print(f"(sizes unknown for {unknown_sizes} files; they are NOT counted below)")
+    for dest in destinations:
+        dest_files = [f for f, d in file_destinations.items() if d == dest]
+        if not dest_files:
+            continue
+        dest_bytes = sum(file_sizes.get(f, 0) for f in dest_files)
+        dest_tapes = [tape for tape in sorted_tapes if any(file_destinations[f] == dest for f in tape_files_map[tape])]
+        print(f" - {dest}: {len(dest_files)} files, {format_size(dest_bytes)} (tapes: {', '.join(dest_tapes)}), "
+              f"keeping {format_size(get_reserve(dest, reserve))} free as a safety margin")
     
     print("\nStarting restoration process...")
     
@@ -179,7 +358,9 @@ def restore_media(csv_file, xml_file, destination):
                                  for f in files_to_copy:
                                      parts = f.split(os.sep)
                                      parts[2] = new_tape_dir
-                                     new_files_list.append(os.sep.join(parts))
+                                     new_path = os.sep.join(parts)
+                                     file_destinations[new_path] = file_destinations[f]
+                                     new_files_list.append(new_path)
                                      
                                  files_to_copy = new_files_list
                                  # Update the first_file check to pass the below check or just break loop here
@@ -198,7 +379,8 @@ def restore_media(csv_file, xml_file, destination):
             break
         
         # Proceed with copy
-        print(f"\nCopying {len(files_to_copy)} files from {tape} to {destination}...")
+        tape_destinations = sorted(set(file_destinations[f] for f in files_to_copy))
+        print(f"\nCopying {len(files_to_copy)} files from {tape} to {', '.join(tape_destinations)}...")
         
         success_count = 0
         fail_count = 0
@@ -215,6 +397,7 @@ def restore_media(csv_file, xml_file, destination):
                     # Or better, just flat copy.
                     
                     filename = os.path.basename(file_path)
+                    destination = file_destinations[file_path]
                     dest_path = os.path.join(destination, filename)
                     
                     # Handle collisions
@@ -248,11 +431,16 @@ def main():
     parser = argparse.ArgumentParser(description="Restore media from LTO tapes interactively.")
     parser.add_argument("csv_file", help="Path to the master CSV file")
     parser.add_argument("--xml", help="Path to the XML file requiring media", default=None)
-    parser.add_argument("--dest", help="Destination folder for restored files", required=True)
+    parser.add_argument("--dest", nargs='+', required=True,
+                        help="Destination folder(s) for restored files. Pass several folders on different "
+                             "volumes to spread the restore across them when one volume is not big enough.")
+    parser.add_argument("--reserve", type=parse_reserve, default=None,
+                        help="Space to keep free on each destination volume, as a size (e.g. 500GB, 0) "
+                             "or a percentage (e.g. 1%%). Default: the larger of 10 GB and 2%% of the volume.")
     
     args = parser.parse_args()
     
-    restore_media(args.csv_file, args.xml, args.dest)
+    restore_media(args.csv_file, args.xml, args.dest, args.reserve)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,185 @@
+import pytest
+
+from extract_lto_tapes import (
+    build_match_index,
+    extract_lto_tapes,
+    match_media,
+    narrow_loose_match,
+    normalize_name,
+    parse_xml_media,
+    read_inventory,
+    reel_clip_token,
+)
+
+
+INVENTORY = """Path,Media,Type,Name,Size
+/Volumes/GN0001/day1,GN0001,file,A001C003_210101_R1AB.mov,100
+/Volumes/GN0001/day2,GN0001,file,A001C003_220909_R2CD.mov,200
+/Volumes/GN0001/sound,GN0001,file,Interview.mov,300
+/Volumes/GN0003/sound,GN0003,file,Interview.mov,300
+/Volumes/GN0004/sound,GN0004,file,Take.mov,10
+/Volumes/GN0004/sound,GN0004,file,Take (1).mov,11
+/Volumes/GN0005/sound,GN0005,file,Take (3).mov,12
+/Volumes/GN0006/grade,GN0006,file,B002C007_230303_X.mov,400
+/Volumes/GN0006/grade,GN0006,file,B002C007_230303_X.mxf,500
+/Volumes/GN0007/other,GN0007,file,Café.mov,600
+/Volumes/GN0007/other,GN0007,file,hero_source.mov,700
+/Volumes/GN0008/other,GN0008,file,Exact.mov,800
+"""
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<xmeml version="5">
+<sequence><media><video><track>
+  <clipitem id="c1">
+    <name>Hero master</name>
+    <file id="f1">
+      <name>Hero master</name>
+      <pathurl>file://localhost/Volumes/LTFS1_GN0007/other/hero_source.mov</pathurl>
+    </file>
+  </clipitem>
+  <clipitem id="c2">
+    <name>Hero shot</name>
+    <file id="f1"/>
+  </clipitem>
+  <clipitem id="c3">
+    <name>Slug</name>
+  </clipitem>
+</track></video></media></sequence>
+</xmeml>
+"""
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    csv_path = tmp_path / "inventory.csv"
+    csv_path.write_text(INVENTORY, encoding="utf-8")
+    return str(csv_path)
+
+
+@pytest.fixture
+def rows(inventory):
+    return read_inventory(inventory)
+
+
+def match(rows, xml_media_names):
+    index = build_match_index(rows)
+    matched_rows, resolved, ambiguous, unresolved = match_media(index, rows, xml_media_names)
+    files = {name: (kind, [rows[i][1] for i in hits]) for name, (kind, hits, copies) in resolved.items()}
+    return matched_rows, files, ambiguous, unresolved
+
+
+def test_normalize_name():
+    assert normalize_name("Café") == normalize_name("CAFÉ") == "café"
+    assert normalize_name("A001.mov.new.01") == "a001"
+    assert normalize_name("Clip (2)") == "clip"
+    assert normalize_name("Clip - Subclip 2") == "clip"
+    assert normalize_name("Clip (2)", strip_suffixes=False) == "clip (2)"
+
+
+@pytest.mark.parametrize("name, token", [
+    ("A001C003_210101_R1AB", "a1c3"),
+    ("A_0045C016_250603_101833_p1C6J", "a45c16"),
+    ("A001_C003_0101AB", "a1c3"),
+    ("Interview", None),
+    ("XA001C003", None),
+])
+def test_reel_clip_token(name, token):
+    assert reel_clip_token(name) == token
+
+
+def test_build_match_index_keeps_inventory_suffixes(rows):
+    index = build_match_index(rows)
+    # "Take (1)" is a real file name, only the stem table strips the suffix
+    assert set(k for k in index['normalized name'] if k.startswith("take")) == {"take", "take (1)", "take (3)"}
+    assert len(index['name stem']["take"]) == 3
+    assert len(index['reel/clip id']["a1c3"]) == 2
+
+
+def test_exact_match_restores_extension_variants(rows):
+    matched_rows, files, ambiguous, unresolved = match(rows, {"B002C007_230303_X"})
+    kind, paths = files["B002C007_230303_X"]
+    assert kind == 'exact name'
+    assert sorted(paths) == ["/Volumes/GN0006/grade/B002C007_230303_X.mov",
+                             "/Volumes/GN0006/grade/B002C007_230303_X.mxf"]
+
+
+def test_pathurl_match(rows):
+    matched_rows, files, ambiguous, unresolved = match(
+        rows, {"Hero shot": "/Volumes/LTFS1_GN0007/other/hero_source.mov"})
+    assert files["Hero shot"] == ('file path', ["/Volumes/GN0007/other/hero_source.mov"])
+
+
+def test_normalized_match(rows):
+    matched_rows, files, ambiguous, unresolved = match(rows, {"CAFÉ.mov.new"})
+    assert files["CAFÉ.mov.new"] == ('normalized name', ["/Volumes/GN0007/other/Café.mov"])
+
+
+def test_reel_clip_match_narrowed_by_name(rows):
+    matched_rows, files, ambiguous, unresolved = match(rows, {"A001C003_210101_R1AB_graded"})
+    assert files["A001C003_210101_R1AB_graded"] == (
+        'reel/clip id', ["/Volumes/GN0001/day1/A001C003_210101_R1AB.mov"])
+
+
+def test_reel_clip_match_on_one_tape_is_still_ambiguous(rows):
+    # Both rows are on GN0001 but they are different shoot days
+    matched_rows, files, ambiguous, unresolved = match(rows, {"A001C003_newname"})
+    assert not matched_rows
+    assert ambiguous["A001C003_newname"][0] == 'reel/clip id'
+    assert len(ambiguous["A001C003_newname"][1]) == 2
+
+
+def test_numbered_variant_is_ambiguous(rows):
+    matched_rows, files, ambiguous, unresolved = match(rows, {"Take (2)"})
+    assert not matched_rows
+    assert "Take (2)" in ambiguous
+
+
+def test_clone_copies_count_as_one_file(rows):
+    matched_rows, files, ambiguous, unresolved = match(rows, {"interview.mov.new"})
+    assert not ambiguous
+    kind, paths = files["interview.mov.new"]
+    assert kind == 'normalized name'
+    assert paths == ["/Volumes/GN0001/sound/Interview.mov"]
+
+
+def test_clone_copy_prefers_needed_tape(rows):
+    # GN0003 is not needed by anything else, GN0001 is
+    matched_rows, files, ambiguous, unresolved = match(rows, {"Interview", "A001C003_220909_R2CD"})
+    assert files["Interview"] == ('exact name', ["/Volumes/GN0001/sound/Interview.mov"])
+    assert set(rows[i][0] for i in matched_rows) == {"GN0001"}
+
+
+def test_unresolved(rows):
+    matched_rows, files, ambiguous, unresolved = match(rows, {"Nothing like it", "Exact"})
+    assert unresolved == ["Nothing like it"]
+    assert files["Exact"][0] == 'exact name'
+
+
+def test_narrow_loose_match_conflicting_sizes():
+    rows = [
+        ("T1", "/Volumes/T1/Interview.mov", "Interview.mov", 1),
+        ("T2", "/Volumes/T2/Interview.mov", "Interview.mov", 2),
+    ]
+    assert narrow_loose_match(rows, [0, 1], ["interview"]) is None
+    rows[1] = ("T2", "/Volumes/T2/Interview.mov", "Interview.mov", None)
+    assert narrow_loose_match(rows, [0, 1], ["interview"]) == [0, 1]
+
+
+def test_parse_xml_media_resolves_file_references(tmp_path):
+    xml_path = tmp_path / "timeline.xml"
+    xml_path.write_text(XML, encoding="utf-8")
+    media = parse_xml_media(str(xml_path))
+    assert media == {
+        "Hero master": "/Volumes/LTFS1_GN0007/other/hero_source.mov",
+        "Hero shot": "/Volumes/LTFS1_GN0007/other/hero_source.mov",
+    }
+
+
+def test_extract_lto_tapes_report(inventory, tmp_path):
+    xml_path = tmp_path / "timeline.xml"
+    xml_path.write_text(XML, encoding="utf-8")
+    report = {}
+    tape_files_map = extract_lto_tapes(inventory, parse_xml_media(str(xml_path)), match_report=report)
+    assert tape_files_map == {"GN0007": ["/Volumes/GN0007/other/hero_source.mov"]}
+    assert report['resolved']["Hero shot"][0] == 'file path'
+    assert report['unresolved'] == []
@@ -0,0 +1,37 @@
+import argparse
+
+import pytest
+
+from extract_lto_tapes import parse_size
+from restore_media import parse_reserve
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1234567", 1234567),
+    ("1,234,567", 1234567),
+    ("1.234.567", 1234567),
+    ("1.5 GB", 1500000000),
+    ("1,5 GB", 1500000000),
+    ("1.234,5 MB", 1234500000),
+    ("700 MiB", 700 * 1024**2),
+    ("2 TB", 2 * 1000**4),
+])
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "abc", "1,2,3", "5 parsecs"])
+def test_parse_size_invalid(value):
+    assert parse_size(value) is None
+
+
+def test_parse_reserve():
+    assert parse_reserve("2%") == 0.02
+    assert parse_reserve("500GB") == 500 * 1000**3
+    assert parse_reserve("0") == 0
+
+
+@pytest.mark.parametrize("value", ["200%", "lots"])
+def test_parse_reserve_invalid(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_reserve(value)